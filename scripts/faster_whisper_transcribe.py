@@ -44,6 +44,8 @@ EMPHASIS_WORDS = {
     "why",
     "what",
 }
+# Silero VAD strips silence before decoding; it is always on.
+VAD_PARAMETERS = {"min_silence_duration_ms": 500}
 EMOJI_RULES = [
     (re.compile(r"(crazy|insane|wild|shocking|wtf|no\s*way)", re.IGNORECASE), "🤯"),
     (re.compile(r"(fire|hot|viral|legend|win|clutch|craziest|hype)", re.IGNORECASE), "🔥"),
@@ -167,23 +169,9 @@ def _format_srt_timestamp(seconds: float) -> str:
     return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
 
 
-def _write_srt(cues, output_path: Path) -> None:
-    lines = []
-    idx = 1
-    for cue in cues:
-        text = str(cue.get("text", "")).strip()
-        start = float(cue.get("start", 0.0))
-        end = float(cue.get("end", 0.0))
-        if not text:
-            continue
-        if end <= start + 0.01:
-            continue
-        lines.append(str(idx))
-        lines.append(f"{_format_srt_timestamp(start)} --> {_format_srt_timestamp(end)}")
-        lines.append(text)
-        lines.append("")
-        idx += 1
-    output_path.write_text("\n".join(lines), encoding="utf-8")
+def _format_srt_block(index: int, start: float, end: float, text: str) -> str:
+    block = f"{index}\n{_format_srt_timestamp(start)} --> {_format_srt_timestamp(end)}\n{text}\n"
+    return block if index == 1 else f"\n{block}"
 
 
 def _resolve_device(requested: str) -> str:
@@ -200,76 +188,131 @@ def _resolve_device(requested: str) -> str:
 
 
 def _resolve_compute_type(device: str, requested: str) -> str:
+    # CTranslate2 resolves "auto" to the fastest type the hardware supports
+    # (e.g. int8_float16 on INT8-capable GPUs, float16 on older ones, int8 on CPU).
     if requested:
         return requested
-    return "float16" if device == "cuda" else "int8"
+    return "auto"
+
+
+# Per-job keys accepted on stdin in --serve mode, mapped to argparse dests.
+SERVE_JOB_KEYS = {
+    "input": "input",
+    "output_dir": "output_dir",
+    "outputDir": "output_dir",
+    "base_name": "base_name",
+    "baseName": "base_name",
+    "language": "language",
+    "beam_size": "beam_size",
+    "beamSize": "beam_size",
+    "best_of": "best_of",
+    "bestOf": "best_of",
+    "patience": "patience",
+    "word_timestamps": "word_timestamps",
+    "wordTimestamps": "word_timestamps",
+}
 
 
-def main() -> int:
+def _build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Transcribe media using faster-whisper and emit SRT + JSON.")
-    parser.add_argument("--input", required=True, help="Input media path.")
-    parser.add_argument("--output-dir", required=True, help="Directory where transcript files are written.")
+    parser.add_argument("--input", default="", help="Input media path (required unless --serve).")
+    parser.add_argument(
+        "--output-dir",
+        default="",
+        help="Directory where transcript files are written (required unless --serve).",
+    )
     parser.add_argument("--base-name", default="", help="Output basename (defaults to input filename stem).")
     parser.add_argument("--model", default="medium", help="faster-whisper model size (e.g. small, medium, large-v3).")
     parser.add_argument("--language", default="", help="Language code, e.g. en.")
     parser.add_argument("--device", default="", help="Device override: cpu or cuda.")
-    parser.add_argument("--compute-type", default="", help="Compute type override (int8, float16, etc.).")
-    parser.add_argument("--beam-size", default=5, type=int, help="Beam size for decoding.")
-    parser.add_argument("--vad-filter", action="store_true", help="Enable VAD filter.")
+    parser.add_argument(
+        "--compute-type",
+        default=os.getenv("FASTER_WHISPER_COMPUTE_TYPE", ""),
+        help=(
+            "Compute type override (auto, int8, int8_float16, float16, etc.). "
+            "Defaults to $FASTER_WHISPER_COMPUTE_TYPE or auto."
+        ),
+    )
+    parser.add_argument("--beam-size", default=1, type=int, help="Beam size for decoding (1 = greedy).")
+    parser.add_argument("--best-of", default=5, type=int, help="Candidates when sampling with non-zero temperature.")
+    parser.add_argument("--patience", default=1.0, type=float, help="Beam search patience factor.")
+    parser.add_argument(
+        "--vad-filter",
+        action="store_true",
+        help="Accepted for compatibility; VAD filtering is always enabled.",
+    )
+    parser.add_argument(
+        "--word-timestamps",
+        action="store_true",
+        help="Request word-level timestamps (extra alignment work; off by default).",
+    )
     parser.add_argument(
         "--no-word-timestamps",
         action="store_true",
-        help="Disable word-level timestamps for faster, lower-memory transcription.",
+        help="Accepted for compatibility; word timestamps are off unless --word-timestamps is given.",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help=(
+            "Load the model once, then read one JSON job per stdin line "
+            "({input, output_dir, base_name, ...}) and write one JSON result per stdout line."
+        ),
+    )
+    return parser
 
-    input_path = Path(args.input).expanduser().resolve()
-    if not input_path.exists():
-        sys.stderr.write(f"Input file not found: {input_path}\n")
-        return 2
+
+def _transcribe(model, args: argparse.Namespace, device: str, compute_type: str):
+    """Run one transcription job; returns (exit_code, result_payload)."""
+    input_path = Path(str(args.input or "")).expanduser().resolve()
+    if not str(args.input or "").strip() or not input_path.exists():
+        return 2, {"ok": False, "error": f"Input file not found: {input_path}"}
+    if not str(args.output_dir or "").strip():
+        return 2, {"ok": False, "error": "Missing output directory"}
 
     output_dir = Path(args.output_dir).expanduser().resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
-    base_name = str(args.base_name).strip() or input_path.stem
-
-    try:
-        from faster_whisper import WhisperModel  # type: ignore
-    except Exception as exc:
-        sys.stderr.write(f"Failed to import faster_whisper: {exc}\n")
-        return 3
+    base_name = str(args.base_name or "").strip() or input_path.stem
 
-    device = _resolve_device(str(args.device or "").strip().lower())
-    compute_type = _resolve_compute_type(device, str(args.compute_type or "").strip())
-    beam_size = max(1, min(10, int(args.beam_size or 5)))
-    word_timestamps = not bool(args.no_word_timestamps)
+    beam_size = max(1, min(10, int(args.beam_size or 1)))
+    best_of = max(1, min(10, int(args.best_of or 5)))
+    patience = max(0.1, min(4.0, float(args.patience or 1.0)))
+    word_timestamps = bool(args.word_timestamps) and not bool(args.no_word_timestamps)
 
     try:
-        model = WhisperModel(args.model, device=device, compute_type=compute_type)
         segments, info = model.transcribe(
             str(input_path),
-            language=(str(args.language).strip() or None),
-            vad_filter=bool(args.vad_filter),
+            language=(str(args.language or "").strip() or None),
+            vad_filter=True,
+            vad_parameters=VAD_PARAMETERS,
             beam_size=beam_size,
+            best_of=best_of,
+            patience=patience,
+            condition_on_previous_text=False,
             word_timestamps=word_timestamps,
         )
     except Exception as exc:
-        sys.stderr.write(f"Failed to transcribe with faster-whisper: {exc}\n")
-        return 4
+        return 4, {"ok": False, "error": f"Failed to transcribe with faster-whisper: {exc}"}
 
+    srt_path = output_dir / f"{base_name}.srt"
+    json_path = output_dir / f"{base_name}.transcript.json"
+
+    # Segments are a lazy generator; write each SRT cue as it is decoded
+    # instead of materialising the whole transcript first.
     cues = []
-    for segment in segments:
-        text = str(getattr(segment, "text", "") or "").strip()
-        start = float(getattr(segment, "start", 0.0) or 0.0)
-        end = float(getattr(segment, "end", 0.0) or 0.0)
-        avg_logprob = getattr(segment, "avg_logprob", None)
-        if not text:
-            continue
-        if end <= start + 0.01:
-            continue
-        raw_words = _normalize_word_rows(getattr(segment, "words", None), start, end) if word_timestamps else []
-        words = _annotate_words(raw_words)
-        cues.append(
-            {
+    with srt_path.open("w", encoding="utf-8") as srt_file:
+        for segment in segments:
+            text = str(getattr(segment, "text", "") or "").strip()
+            start = float(getattr(segment, "start", 0.0) or 0.0)
+            end = float(getattr(segment, "end", 0.0) or 0.0)
+            avg_logprob = getattr(segment, "avg_logprob", None)
+            if not text:
+                continue
+            if end <= start + 0.01:
+                continue
+            raw_words = _normalize_word_rows(getattr(segment, "words", None), start, end) if word_timestamps else []
+            words = _annotate_words(raw_words)
+            cue = {
                 "text": text,
                 "start": round(start, 3),
                 "end": round(end, 3),
@@ -277,11 +320,9 @@ def main() -> int:
                 "words": words,
                 "speaker": None,
             }
-        )
+            cues.append(cue)
+            srt_file.write(_format_srt_block(len(cues), cue["start"], cue["end"], text))
 
-    srt_path = output_dir / f"{base_name}.srt"
-    json_path = output_dir / f"{base_name}.transcript.json"
-    _write_srt(cues, srt_path)
     json_path.write_text(
         json.dumps(
             {
@@ -299,7 +340,7 @@ def main() -> int:
         encoding="utf-8",
     )
 
-    result = {
+    return 0, {
         "ok": True,
         "srtPath": str(srt_path),
         "jsonPath": str(json_path),
@@ -309,6 +350,69 @@ def main() -> int:
         "model": args.model,
         "wordLevelTimestamps": word_timestamps,
     }
+
+
+def _serve(model, args: argparse.Namespace, device: str, compute_type: str) -> int:
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        job_id = None
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("job must be a JSON object")
+            job_id = job.get("id")
+            job_args = argparse.Namespace(**vars(args))
+            for key, dest in SERVE_JOB_KEYS.items():
+                if key in job and job[key] is not None:
+                    setattr(job_args, dest, job[key])
+            _, result = _transcribe(model, job_args, device, compute_type)
+        except Exception as exc:
+            result = {"ok": False, "error": f"Job failed: {exc}"}
+        if job_id is not None:
+            result["id"] = job_id
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+    return 0
+
+
+def main() -> int:
+    args = _build_arg_parser().parse_args()
+
+    if not args.serve:
+        input_path = Path(args.input).expanduser().resolve()
+        if not str(args.input).strip() or not input_path.exists():
+            sys.stderr.write(f"Input file not found: {input_path}\n")
+            return 2
+        if not str(args.output_dir).strip():
+            sys.stderr.write("--output-dir is required\n")
+            return 2
+
+    try:
+        from faster_whisper import WhisperModel  # type: ignore
+    except Exception as exc:
+        sys.stderr.write(f"Failed to import faster_whisper: {exc}\n")
+        return 3
+
+    device = _resolve_device(str(args.device or "").strip().lower())
+    compute_type = _resolve_compute_type(device, str(args.compute_type or "").strip())
+
+    try:
+        model = WhisperModel(args.model, device=device, compute_type=compute_type)
+    except Exception as exc:
+        sys.stderr.write(f"Failed to transcribe with faster-whisper: {exc}\n")
+        return 4
+    # Report what "auto" resolved to rather than the literal request.
+    compute_type = str(getattr(getattr(model, "model", None), "compute_type", "") or compute_type)
+
+    if args.serve:
+        return _serve(model, args, device, compute_type)
+
+    code, result = _transcribe(model, args, device, compute_type)
+    if code != 0:
+        sys.stderr.write(f"{result['error']}\n")
+        return code
     sys.stdout.write(json.dumps(result) + "\n")
     return 0
 
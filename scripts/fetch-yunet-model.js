@@ -0,0 +1,58 @@
+const crypto = require('crypto')
+const { existsSync, mkdirSync, readFileSync, writeFileSync } = require('fs')
+const path = require('path')
+
+// Fetches the YuNet face detector used by scripts/vibecut_frame_scanner.py
+// from a pinned opencv_zoo commit and refuses anything whose sha256 does not
+// match. Without both pins the scanner keeps using its Haar fallback.
+
+const MODEL_FILE = 'face_detection_yunet_2023mar.onnx'
+const MODEL_PATH = path.resolve(__dirname, 'models', MODEL_FILE)
+const COMMIT_PATTERN = /^[0-9a-f]{40}$/
+const SHA256_PATTERN = /^[0-9a-f]{64}$/
+
+const commit = String(process.env.YUNET_MODEL_COMMIT || '').trim().toLowerCase()
+const expectedSha256 = String(process.env.YUNET_MODEL_SHA256 || '').trim().toLowerCase()
+
+const sha256Of = (buffer) => crypto.createHash('sha256').update(buffer).digest('hex')
+
+const main = async () => {
+  if (!commit && !expectedSha256) {
+    console.log('[yunet-model] skipped; set YUNET_MODEL_COMMIT and YUNET_MODEL_SHA256 to bundle YuNet (scanner uses Haar)')
+    return 0
+  }
+  if (!COMMIT_PATTERN.test(commit) || !SHA256_PATTERN.test(expectedSha256)) {
+    console.error('[yunet-model] YUNET_MODEL_COMMIT must be a 40-char commit SHA and YUNET_MODEL_SHA256 a 64-char hex digest')
+    return 1
+  }
+  if (existsSync(MODEL_PATH) && sha256Of(readFileSync(MODEL_PATH)) === expectedSha256) {
+    console.log(`[yunet-model] ${MODEL_FILE} already present`)
+    return 0
+  }
+
+  // github.com/<repo>/raw/<sha>/ resolves Git LFS objects; raw.githubusercontent.com
+  // would return the LFS pointer file instead of the model.
+  const url = `https://github.com/opencv/opencv_zoo/raw/${commit}/models/face_detection_yunet/${MODEL_FILE}`
+  const response = await fetch(url)
+  if (!response.ok) {
+    console.error(`[yunet-model] download failed (${response.status}) from ${url}`)
+    return 1
+  }
+  const body = Buffer.from(await response.arrayBuffer())
+  const actualSha256 = sha256Of(body)
+  if (actualSha256 !== expectedSha256) {
+    console.error(`[yunet-model] sha256 mismatch for ${url}: expected ${expectedSha256}, got ${actualSha256}`)
+    return 1
+  }
+  mkdirSync(path.dirname(MODEL_PATH), { recursive: true })
+  writeFileSync(MODEL_PATH, body)
+  console.log(`[yunet-model] installed ${MODEL_FILE} (${body.length} bytes) from opencv_zoo@${commit.slice(0, 12)}`)
+  return 0
+}
+
+main()
+  .then((code) => process.exit(code))
+  .catch((error) => {
+    console.error('[yunet-model] failed', error?.message || error)
+    process.exit(1)
+  })
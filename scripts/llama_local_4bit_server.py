@@ -6,41 +6,119 @@ WARNING:
 - Use hosted Hugging Face inference for 405B in production.
 - For local testing, prefer 70B/8B quantized variants.
 
+Backends:
+- vllm (default when installed): quantization is read from the checkpoint
+  config, so AWQ checkpoints (quantized offline with AutoAWQ, e.g.
+  hugging-quants/Meta-Llama-3.1-70B-Instruct-AWQ-INT4) run through the fused
+  Marlin INT4 kernels. Set LOCAL_LLAMA_QUANTIZATION=fp8 to quantize an
+  unquantized checkpoint on the fly on Hopper/Ada.
+- transformers: bitsandbytes NF4 fallback; low memory but much slower decode.
+
 Usage:
-  pip install torch transformers accelerate bitsandbytes fastapi uvicorn
+  pip install torch transformers fastapi uvicorn vllm
+  (or: pip install torch transformers accelerate bitsandbytes fastapi uvicorn)
   set HF_TOKEN=...
-  set LOCAL_LLAMA_MODEL=meta-llama/Meta-Llama-3.1-70B-Instruct
+  set LOCAL_LLAMA_MODEL=hugging-quants/Meta-Llama-3.1-70B-Instruct-AWQ-INT4
+  set LOCAL_LLAMA_BACKEND=vllm          (optional, vllm or transformers)
+  set LOCAL_LLAMA_QUANTIZATION=fp8    (optional, vllm only: overrides the checkpoint, e.g. awq_marlin, fp8)
+  set LOCAL_LLAMA_MAX_BATCH_SIZE=32   (optional, concurrent prompts per generate call)
+  set LOCAL_LLAMA_BATCH_WAIT_MS=2     (optional, how long to wait for a batch to fill)
+  set LOCAL_LLAMA_COMPILE=1           (optional, transformers only: torch.compile + static KV cache; off by default,
+                                       compiles ~30 bucketed shapes at startup)
   python scripts/llama_local_4bit_server.py
 """
 
+import asyncio
 import os
-from typing import Any, Dict, List, Optional
+import sys
+from typing import Any, Dict, List, Optional, Tuple
 
 import torch
 from fastapi import FastAPI
 from pydantic import BaseModel
-from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+from transformers import AutoTokenizer
+
+try:
+    from vllm import LLM, SamplingParams  # type: ignore
+except Exception:
+    LLM = None
+    SamplingParams = None
 
-MODEL_ID = os.getenv("LOCAL_LLAMA_MODEL", "meta-llama/Meta-Llama-3.1-70B-Instruct")
+BACKEND = os.getenv("LOCAL_LLAMA_BACKEND", "").strip().lower()
+if not BACKEND:
+    BACKEND = "vllm" if LLM is not None else "transformers"
+    sys.stderr.write(
+        f"LOCAL_LLAMA_BACKEND not set; using {BACKEND} "
+        f"({'vllm is installed' if LLM is not None else 'vllm is not installed'})\n"
+    )
+# None lets vLLM take the quantization method from the checkpoint config, so
+# unquantized models are not forced through AWQ kernels.
+QUANTIZATION = os.getenv("LOCAL_LLAMA_QUANTIZATION", "").strip() or None
+DEFAULT_MODEL_ID = (
+    "hugging-quants/Meta-Llama-3.1-70B-Instruct-AWQ-INT4"
+    if BACKEND == "vllm"
+    else "meta-llama/Meta-Llama-3.1-70B-Instruct"
+)
+MODEL_ID = os.getenv("LOCAL_LLAMA_MODEL", DEFAULT_MODEL_ID)
 HF_TOKEN = os.getenv("HF_TOKEN", "").strip() or None
 MAX_INPUT_TOKENS = int(os.getenv("LOCAL_LLAMA_MAX_INPUT_TOKENS", "4096"))
+MAX_BATCH_SIZE = max(1, int(os.getenv("LOCAL_LLAMA_MAX_BATCH_SIZE", "32")))
+BATCH_WAIT_TIMEOUT_S = max(0.0, float(os.getenv("LOCAL_LLAMA_BATCH_WAIT_MS", "2")) / 1000.0)
+COMPILE_DECODE = os.getenv("LOCAL_LLAMA_COMPILE", "0").strip().lower() not in ("0", "false", "no", "off")
+# Static-cache CUDA graphs are captured per shape (batch size x prompt length x
+# cache length), so all three are rounded up to a few coarse sizes. Every
+# combination is compiled at startup, so the set is kept small: with the
+# defaults that is 5 prompt x 2 new-token x 3 batch buckets = 30 shapes.
+PROMPT_LEN_BUCKETS = [256]
+while PROMPT_LEN_BUCKETS[-1] < MAX_INPUT_TOKENS:
+    PROMPT_LEN_BUCKETS.append(PROMPT_LEN_BUCKETS[-1] * 2)
+PROMPT_LEN_BUCKETS[-1] = min(PROMPT_LEN_BUCKETS[-1], max(1, MAX_INPUT_TOKENS))
+MAX_NEW_TOKENS_BUCKETS = (512, 1200)
+BATCH_SIZE_BUCKETS = sorted({min(size, MAX_BATCH_SIZE) for size in (1, 4, MAX_BATCH_SIZE)})
 
-bnb_config = BitsAndBytesConfig(
-    load_in_4bit=True,
-    bnb_4bit_use_double_quant=True,
-    bnb_4bit_quant_type="nf4",
-    bnb_4bit_compute_dtype=torch.float16,
-)
 
-tokenizer = AutoTokenizer.from_pretrained(MODEL_ID, token=HF_TOKEN)
-model = AutoModelForCausalLM.from_pretrained(
-    MODEL_ID,
-    token=HF_TOKEN,
-    quantization_config=bnb_config,
-    torch_dtype=torch.float16,
-    device_map="auto",
-)
-model.eval()
+def bucket_for(value: int, buckets: List[int]) -> int:
+    return next((size for size in buckets if size >= value), buckets[-1])
+
+llm = None
+model = None
+tokenizer = None
+if BACKEND == "vllm":
+    if LLM is None:
+        raise SystemExit("LOCAL_LLAMA_BACKEND=vllm but vllm is not installed")
+    llm = LLM(
+        model=MODEL_ID,
+        quantization=QUANTIZATION,
+        dtype="float16",
+        tensor_parallel_size=max(1, int(os.getenv("LOCAL_LLAMA_TENSOR_PARALLEL", "0") or 0) or torch.cuda.device_count()),
+        max_model_len=MAX_INPUT_TOKENS + 1200,
+    )
+else:
+    from transformers import AutoModelForCausalLM, BitsAndBytesConfig
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_ID, token=HF_TOKEN)
+    # Batched prompts are left-padded so every completion starts at the same offset.
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token_id is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    bnb_config = BitsAndBytesConfig(
+        load_in_4bit=True,
+        bnb_4bit_use_double_quant=True,
+        bnb_4bit_quant_type="nf4",
+        bnb_4bit_compute_dtype=torch.float16,
+    )
+    model = AutoModelForCausalLM.from_pretrained(
+        MODEL_ID,
+        token=HF_TOKEN,
+        quantization_config=bnb_config,
+        torch_dtype=torch.float16,
+        device_map="auto",
+    )
+    model.eval()
+    if COMPILE_DECODE:
+        # vLLM captures its own CUDA graphs; the transformers path needs
+        # torch.compile plus a static KV cache to avoid per-token launch overhead.
+        model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
 
 app = FastAPI(title="AutoEditor Local Llama 4-bit Server")
 
@@ -73,8 +151,158 @@ def resolve_prompt(req: CompletionRequest) -> str:
     return ""
 
 
+# (do_sample, temperature, top_p): with the transformers backend, requests only
+# share a generate() call when they agree on sampling settings. vLLM takes
+# per-prompt sampling params, so its batches are not split.
+SamplingKey = Tuple[bool, float, float]
+PendingCompletion = Tuple[str, int, SamplingKey, "asyncio.Future[str]"]
+
+pending_completions: "Optional[asyncio.Queue[PendingCompletion]]" = None
+# Held so the worker task is not garbage-collected while it runs.
+batch_worker_task: "Optional[asyncio.Task[None]]" = None
+
+
+def generate_batch_vllm(prompts: List[str], max_new_tokens: List[int], samplings: List[SamplingKey]) -> List[str]:
+    params = [
+        SamplingParams(
+            max_tokens=limit,
+            temperature=temperature if do_sample else 0.0,
+            top_p=top_p,
+            truncate_prompt_tokens=MAX_INPUT_TOKENS,
+        )
+        for limit, (do_sample, temperature, top_p) in zip(max_new_tokens, samplings)
+    ]
+    outputs = llm.generate(prompts, params, use_tqdm=False)
+    return [output.outputs[0].text.strip() if output.outputs else "" for output in outputs]
+
+
+def generate_batch_transformers(
+    prompts: List[str], max_new_tokens: List[int], samplings: List[SamplingKey]
+) -> List[str]:
+    do_sample, temperature, top_p = samplings[0]
+    batch_max_new_tokens = max(max_new_tokens)
+    extra_generate_kwargs: Dict[str, Any] = {}
+    padding: Any = True
+    max_length = MAX_INPUT_TOKENS
+    if COMPILE_DECODE:
+        batch_max_new_tokens = bucket_for(batch_max_new_tokens, list(MAX_NEW_TOKENS_BUCKETS))
+        extra_generate_kwargs["cache_implementation"] = "static"
+        longest = max(len(ids) for ids in tokenizer(prompts, truncation=True, max_length=MAX_INPUT_TOKENS)["input_ids"])
+        padding = "max_length"
+        max_length = bucket_for(longest, PROMPT_LEN_BUCKETS)
+        # Filler rows repeat the last prompt; their outputs are dropped below.
+        prompts = prompts + [prompts[-1]] * (bucket_for(len(prompts), BATCH_SIZE_BUCKETS) - len(prompts))
+    encoded = tokenizer(
+        prompts,
+        padding=padding,
+        truncation=True,
+        max_length=max_length,
+        return_tensors="pt",
+    ).to(model.device)
+    with torch.inference_mode():
+        generated = model.generate(
+            input_ids=encoded["input_ids"],
+            attention_mask=encoded["attention_mask"],
+            max_new_tokens=batch_max_new_tokens,
+            do_sample=do_sample,
+            temperature=temperature,
+            top_p=top_p,
+            eos_token_id=tokenizer.eos_token_id,
+            pad_token_id=tokenizer.pad_token_id,
+            **extra_generate_kwargs,
+        )
+    prompt_len = encoded["input_ids"].shape[1]
+    return [
+        tokenizer.decode(generated[i, prompt_len : prompt_len + limit], skip_special_tokens=True).strip()
+        for i, limit in enumerate(max_new_tokens)
+    ]
+
+
+generate_batch = generate_batch_vllm if llm is not None else generate_batch_transformers
+
+if model is not None and COMPILE_DECODE:
+    # Compile and capture every bucketed shape before serving, so no request
+    # pays for a recompile. This dominates startup time.
+    warmup_shapes = [
+        (batch_size, prompt_len, new_tokens)
+        for batch_size in BATCH_SIZE_BUCKETS
+        for prompt_len in PROMPT_LEN_BUCKETS
+        for new_tokens in MAX_NEW_TOKENS_BUCKETS
+    ]
+    for index, (batch_size, prompt_len, new_tokens) in enumerate(warmup_shapes, start=1):
+        sys.stderr.write(
+            f"compile warmup {index}/{len(warmup_shapes)}: batch={batch_size} prompt={prompt_len} new={new_tokens}\n"
+        )
+        generate_batch(["Hello"] * batch_size, [new_tokens] * batch_size, [(False, 0.0, 1.0)] * batch_size)
+
+
+def batch_group_key(item: PendingCompletion) -> Optional[SamplingKey]:
+    return None if llm is not None else item[2]
+
+
+async def drain_batch(queue: "asyncio.Queue[PendingCompletion]") -> List[PendingCompletion]:
+    loop = asyncio.get_running_loop()
+    batch = [await queue.get()]
+    deadline = loop.time() + BATCH_WAIT_TIMEOUT_S
+    while len(batch) < MAX_BATCH_SIZE:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+
+async def batch_worker(queue: "asyncio.Queue[PendingCompletion]") -> None:
+    while True:
+        batch = await drain_batch(queue)
+        groups: Dict[Optional[SamplingKey], List[PendingCompletion]] = {}
+        for item in batch:
+            groups.setdefault(batch_group_key(item), []).append(item)
+        for items in groups.values():
+            try:
+                # generate() blocks; keep the event loop free to accept the next batch.
+                texts = await asyncio.to_thread(
+                    generate_batch,
+                    [item[0] for item in items],
+                    [item[1] for item in items],
+                    [item[2] for item in items],
+                )
+            except Exception as exc:
+                for item in items:
+                    if not item[3].done():
+                        item[3].set_exception(exc)
+                continue
+            for item, text in zip(items, texts):
+                if not item[3].done():
+                    item[3].set_result(text)
+
+
+def on_batch_worker_done(task: "asyncio.Task[None]") -> None:
+    if task.cancelled():
+        return
+    exc = task.exception()
+    sys.stderr.write(f"batch worker stopped: {exc!r}\n")
+    # Nothing will drain the queue any more; fail waiting requests instead of
+    # leaving them hanging.
+    while pending_completions is not None and not pending_completions.empty():
+        item = pending_completions.get_nowait()
+        if not item[3].done():
+            item[3].set_exception(RuntimeError("batch worker stopped"))
+
+
+@app.on_event("startup")
+async def start_batch_worker() -> None:
+    global pending_completions, batch_worker_task
+    pending_completions = asyncio.Queue()
+    batch_worker_task = asyncio.create_task(batch_worker(pending_completions))
+    batch_worker_task.add_done_callback(on_batch_worker_done)
+
+
 @app.post("/v1/completions")
-def completions(req: CompletionRequest) -> Dict[str, Any]:
+async def completions(req: CompletionRequest) -> Dict[str, Any]:
     prompt = resolve_prompt(req)
     if not prompt:
         return {"error": "empty_prompt"}
@@ -83,20 +311,18 @@ def completions(req: CompletionRequest) -> Dict[str, Any]:
     max_new_tokens = max(32, min(max_new_tokens, 1200))
     temperature = float(req.temperature or 0.2)
     top_p = float(req.top_p or 0.9)
+    sampling: SamplingKey = (
+        temperature > 0,
+        max(0.0, min(temperature, 1.2)),
+        max(0.1, min(top_p, 1.0)),
+    )
 
-    encoded = tokenizer(prompt, return_tensors="pt", truncation=True, max_length=MAX_INPUT_TOKENS).to(model.device)
-    with torch.inference_mode():
-        generated = model.generate(
-            **encoded,
-            max_new_tokens=max_new_tokens,
-            do_sample=temperature > 0,
-            temperature=max(0.0, min(temperature, 1.2)),
-            top_p=max(0.1, min(top_p, 1.0)),
-            eos_token_id=tokenizer.eos_token_id,
-            pad_token_id=tokenizer.eos_token_id,
-        )
-    completion_ids = generated[0][encoded["input_ids"].shape[1]:]
-    text = tokenizer.decode(completion_ids, skip_special_tokens=True).strip()
+    if batch_worker_task is None or batch_worker_task.done():
+        return {"error": "batch_worker_stopped"}
+
+    future: "asyncio.Future[str]" = asyncio.get_running_loop().create_future()
+    await pending_completions.put((prompt, max_new_tokens, sampling, future))
+    text = await future
 
     return {
         "model": MODEL_ID,
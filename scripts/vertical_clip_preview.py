@@ -18,6 +18,7 @@ from pathlib import Path
 from typing import List
 
 import cv2
+import numpy as np
 
 try:
     import tkinter as tk
@@ -26,12 +27,6 @@ except Exception as exc:  # pragma: no cover - GUI availability depends on host
     print(json.dumps({"ok": False, "error": f"tkinter_unavailable:{exc}"}))
     raise SystemExit(0)
 
-try:
-    from PIL import Image, ImageTk
-except Exception as exc:  # pragma: no cover - optional dependency at runtime
-    print(json.dumps({"ok": False, "error": f"pillow_unavailable:{exc}"}))
-    raise SystemExit(0)
-
 
 def parse_clip_paths(raw: str) -> List[Path]:
     try:
@@ -58,7 +53,6 @@ class ClipPreviewWindow:
         self.cap = cv2.VideoCapture(str(clip_path))
         self.playing = True
         self.closed = False
-        self.frame_image = None
 
         fps = float(self.cap.get(cv2.CAP_PROP_FPS) or 0.0)
         self.delay_ms = max(15, int(1000 / (fps if fps > 0 else 30)))
@@ -73,6 +67,17 @@ class ClipPreviewWindow:
         self.video_label = tk.Label(self.window, bg="#0D1117")
         self.video_label.pack(fill=tk.BOTH, expand=True, padx=8, pady=(8, 6))
 
+        # Output buffers and the Tk image are sized once and only rebuilt when
+        # the label is resized, so each tick just fills them in place.
+        self.frame_w = max(1, width)
+        self.frame_h = max(1, height)
+        self.label_w = 240
+        self.label_h = 426
+        self.out_w = 0
+        self.out_h = 0
+        self.allocate_buffers()
+        self.video_label.bind("<Configure>", self.on_label_configure)
+
         controls = tk.Frame(self.window)
         controls.pack(fill=tk.X, padx=8, pady=(0, 8))
 
@@ -114,18 +119,40 @@ class ClipPreviewWindow:
             self.render_frame(frame)
         self.schedule_next_tick()
 
+    def allocate_buffers(self):
+        scale = min(self.label_w / self.frame_w, self.label_h / self.frame_h)
+        out_w = max(1, int(self.frame_w * scale))
+        out_h = max(1, int(self.frame_h * scale))
+        if (out_w, out_h) == (self.out_w, self.out_h):
+            return
+        self.out_w = out_w
+        self.out_h = out_h
+        self.bgr_buf = np.empty((out_h, out_w, 3), dtype=np.uint8)
+        self.rgb_buf = np.empty((out_h, out_w, 3), dtype=np.uint8)
+        # Frames are handed to Tk as binary PPM, so no PIL round-trip is needed.
+        self.ppm_header = f"P6 {out_w} {out_h} 255 ".encode("ascii")
+        self.photo = tk.PhotoImage(master=self.window, width=out_w, height=out_h)
+        self.video_label.configure(image=self.photo)
+
+    def on_label_configure(self, event):
+        label_w = max(240, int(event.width))
+        label_h = max(426, int(event.height))
+        if (label_w, label_h) == (self.label_w, self.label_h):
+            return
+        self.label_w = label_w
+        self.label_h = label_h
+        self.allocate_buffers()
+
     def render_frame(self, frame):
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame_h, frame_w = rgb.shape[:2]
-        label_w = max(240, self.video_label.winfo_width())
-        label_h = max(426, self.video_label.winfo_height())
-        scale = min(label_w / frame_w, label_h / frame_h)
-        out_w = max(1, int(frame_w * scale))
-        out_h = max(1, int(frame_h * scale))
-        resized = cv2.resize(rgb, (out_w, out_h), interpolation=cv2.INTER_AREA)
-        pil = Image.fromarray(resized)
-        self.frame_image = ImageTk.PhotoImage(image=pil)
-        self.video_label.configure(image=self.frame_image)
+        frame_h, frame_w = frame.shape[:2]
+        if (frame_w, frame_h) != (self.frame_w, self.frame_h):
+            self.frame_w = frame_w
+            self.frame_h = frame_h
+            self.allocate_buffers()
+        # Resize first so the colour conversion runs on the smaller image.
+        cv2.resize(frame, (self.out_w, self.out_h), dst=self.bgr_buf, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.bgr_buf, cv2.COLOR_BGR2RGB, dst=self.rgb_buf)
+        self.photo.configure(data=self.ppm_header + self.rgb_buf.tobytes(), format="PPM")
 
     def toggle_play(self):
         self.playing = not self.playing
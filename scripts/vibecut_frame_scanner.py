@@ -9,8 +9,34 @@ from __future__ import annotations
 import argparse
 import json
 import math
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Past roughly one GOP of stride, decoding every intermediate frame costs more
+# than a keyframe seek, so sparse sampling keeps the seek path.
+SEQUENTIAL_MAX_STRIDE = 250
+
+# Every output is a scalar density/motion ratio, so analysis runs on a small
+# aspect-preserving copy of each frame (320x180 for 16:9 sources).
+ANALYSIS_LONG_SIDE = 320
+
+# Face placement drifts slowly, so the detector only runs on every Nth sample
+# and intermediate samples reuse the last centered-face ratio.
+FACE_CACHE_INTERVAL = 5
+
+# Face-detection frames handed to the thread pool at once. At most two batches
+# are in flight, which bounds how many frames are held for detection.
+FACE_BATCH_SIZE = 16
+
+# Decoded frames buffered between the decode thread and the analysis loop.
+FRAME_QUEUE_SIZE = 4
+
+DEFAULT_YUNET_MODEL = Path(__file__).resolve().parent / "models" / "face_detection_yunet_2023mar.onnx"
+
 
 def clamp(value: float, low: float, high: float) -> float:
     return max(low, min(high, value))
@@ -29,10 +55,106 @@ def fallback_payload() -> dict:
     }
 
 
+def rect_sum(ii, x1: int, y1: int, x2: int, y2: int) -> float:
+    return float(ii[y2, x2] - ii[y1, x2] - ii[y2, x1] + ii[y1, x1])
+
+
+def rect_density(ii, x1: int, y1: int, x2: int, y2: int) -> float:
+    area = (x2 - x1) * (y2 - y1)
+    if area <= 0:
+        return 0.0
+    return rect_sum(ii, x1, y1, x2, y2) / (area * 255.0)
+
+
+def create_face_detector(cv2, np, model_path: Path, input_size: tuple[int, int]):
+    """Return (name, detect), where detect maps (bgr, gray) to an (N, 4) array
+    of x, y, w, h boxes.
+
+    Prefers YuNet (cv2.FaceDetectorYN) when the ONNX model is available and
+    falls back to the bundled Haar cascade otherwise.
+    """
+    if hasattr(cv2, "FaceDetectorYN") and model_path.exists():
+        try:
+            yunet = cv2.FaceDetectorYN.create(str(model_path), "", input_size)
+
+            def detect_yunet(bgr, _gray):
+                _, faces = yunet.detect(bgr)
+                if faces is None:
+                    return np.empty((0, 4), dtype=np.float32)
+                return faces[:, :4]
+
+            return "yunet", detect_yunet
+        except Exception:
+            pass
+
+    haar = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+    def detect_haar(_bgr, gray):
+        faces = haar.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(12, 12))
+        return np.asarray(faces, dtype=np.float32).reshape(-1, 4)
+
+    return "haar", detect_haar
+
+
+def iter_sampled_frames(cap, cv2, total_frames: int, sample_stride: int):
+    if sample_stride > SEQUENTIAL_MAX_STRIDE:
+        frame_index = 0
+        while frame_index < total_frames:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            ok, frame = cap.read()
+            if ok and frame is not None:
+                yield frame_index, frame
+            frame_index += sample_stride
+        return
+
+    frame_index = 0
+    next_sample = 0
+    while frame_index < total_frames:
+        if not cap.grab():
+            break
+        if frame_index == next_sample:
+            ok, frame = cap.retrieve()
+            if ok and frame is not None:
+                yield frame_index, frame
+            next_sample += sample_stride
+        frame_index += 1
+
+
+def start_frame_producer(cap, cv2, total_frames: int, sample_stride: int, analysis_size: tuple[int, int]):
+    """Decode and downscale sampled frames on a background thread.
+
+    Yields (frame_index, small_bgr, gray) tuples through a bounded queue; None
+    marks the end of the stream. FFmpeg decode and the OpenCV resize/convert
+    calls release the GIL, so this overlaps with analysis in the main thread.
+    """
+    frames: queue.Queue = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+
+    def produce() -> None:
+        try:
+            for frame_index, frame in iter_sampled_frames(cap, cv2, total_frames, sample_stride):
+                # YuNet needs BGR input, so downscale the colour frame and derive gray from it.
+                small_bgr = frame
+                if (frame.shape[1], frame.shape[0]) != analysis_size:
+                    small_bgr = cv2.resize(frame, analysis_size, interpolation=cv2.INTER_AREA)
+                gray = cv2.cvtColor(small_bgr, cv2.COLOR_BGR2GRAY)
+                frames.put((frame_index, small_bgr, gray))
+        finally:
+            frames.put(None)
+
+    producer = threading.Thread(target=produce, name="vibecut-frame-decode", daemon=True)
+    producer.start()
+    return frames, producer
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Scan video frames for orientation and retention hints.")
     parser.add_argument("--input", required=True, help="Input video path")
     parser.add_argument("--sample-ratio", default=0.1, type=float, help="Fraction of frames to sample")
+    parser.add_argument(
+        "--face-model",
+        default=os.getenv("VIBECUT_YUNET_MODEL", str(DEFAULT_YUNET_MODEL)),
+        help="YuNet ONNX model path (falls back to Haar cascade when missing)",
+    )
     args = parser.parse_args()
 
     input_path = Path(args.input).expanduser().resolve()
@@ -66,92 +188,184 @@ def main() -> int:
     sample_count = max(1, int(total_frames * sample_ratio))
     sample_stride = max(1, total_frames // sample_count)
 
-    face_detector = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    analysis_scale = min(1.0, ANALYSIS_LONG_SIDE / float(max(width, height)))
+    analysis_size = (
+        max(1, int(round(width * analysis_scale))),
+        max(1, int(round(height * analysis_scale))),
+    )
+
+    # Every sampled frame is resized to analysis_size, so all region geometry
+    # is loop-invariant and computed once here.
+    w, h = analysis_size
+    x_mid = w // 2
+    y_mid = h // 2
+    center_x1 = int(w * 0.25)
+    center_x2 = int(w * 0.75)
+    center_y1 = int(h * 0.18)
+    center_y2 = int(h * 0.85)
+    face_x1, face_x2 = 0.28 * w, 0.72 * w
+    face_y1, face_y2 = 0.18 * h, 0.8 * h
+    band_x1, band_x2 = int(w * 0.2), int(w * 0.8)
+    horizontal_band = (slice(None), slice(band_x1, band_x2))
+    portrait_bias = 1.0 if h >= w else 0.0
+    landscape_bias = 1.0 if w > h else 0.0
+    inv_255 = np.float32(1.0 / 255.0)
+
+    # left, right, top, bottom, center
+    density_regions = (
+        (0, 0, x_mid, h),
+        (x_mid, 0, w, h),
+        (0, 0, w, y_mid),
+        (0, y_mid, w, h),
+        (center_x1, center_y1, center_x2, center_y2),
+    )
+
+    def measure_cpu(gray, prev):
+        edges = cv2.Canny(gray, 80, 190)
+        # One pass over the edge map; each region density is then four lookups.
+        ii = cv2.integral(edges)
+        densities = [rect_density(ii, *region) for region in density_regions]
+        motion, horizontal = np.float32(0.0), np.float32(0.0)
+        if prev is not None:
+            diff = cv2.absdiff(prev, gray)
+            motion = diff.mean(dtype=np.float32) * inv_255
+            horizontal = diff[horizontal_band].mean(dtype=np.float32) * inv_255
+        return densities, motion, horizontal
+
+    def measure_opencl(gray_u, prev_u):
+        # Canny edges are 0/255, so a region's density is its non-zero count
+        # over its area; the counts and means are device reductions, so only
+        # scalars come back to the host.
+        edges_u = cv2.Canny(gray_u, 80, 190)
+        densities = [
+            cv2.countNonZero(cv2.UMat(edges_u, (y1, y2), (x1, x2))) / ((x2 - x1) * (y2 - y1))
+            for x1, y1, x2, y2 in density_regions
+        ]
+        motion, horizontal = np.float32(0.0), np.float32(0.0)
+        if prev_u is not None:
+            diff_u = cv2.absdiff(prev_u, gray_u)
+            motion = np.float32(cv2.mean(diff_u)[0]) * inv_255
+            horizontal = np.float32(cv2.mean(cv2.UMat(diff_u, (0, h), (band_x1, band_x2)))[0]) * inv_255
+        return densities, motion, horizontal
+
+    # Opt-in: at analysis resolution the host/device round-trips have not been
+    # shown to beat the CPU path, and some OpenCL runtimes fail mid-scan.
+    use_opencl = os.getenv("VIBECUT_SCANNER_OPENCL", "0").strip().lower() not in ("0", "false", "no", "off")
+    use_opencl = use_opencl and cv2.ocl.haveOpenCL()
+    if use_opencl:
+        cv2.ocl.setUseOpenCL(True)
+
+    # Detectors are not thread-safe, so each pool thread builds its own. OpenCV's
+    # internal threading is disabled so it doesn't compete with the pool.
+    face_model = Path(args.face_model).expanduser()
+    detector_local = threading.local()
+    detector_names: set[str] = set()
+
+    def centered_face_ratio(sample) -> float:
+        detect_faces = getattr(detector_local, "detect_faces", None)
+        if detect_faces is None:
+            detector_name, detect_faces = create_face_detector(cv2, np, face_model, analysis_size)
+            detector_names.add(detector_name)
+            detector_local.detect_faces = detect_faces
+        faces = detect_faces(*sample)
+        if len(faces) == 0:
+            return 0.0
+        cx = faces[:, 0] + faces[:, 2] * 0.5
+        cy = faces[:, 1] + faces[:, 3] * 0.5
+        centered = (cx >= face_x1) & (cx <= face_x2) & (cy >= face_y1) & (cy <= face_y2)
+        return clamp(int(np.count_nonzero(centered)) / len(faces), 0.0, 1.0)
+
+    cv2.setNumThreads(1)
+    face_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+    face_batch: list = []
+    face_batch_results = None
+    # Centered-face ratio of each detection sample, in sample order.
+    face_ratios: list[float] = []
 
     sampled_frames = 0
-    portrait_score_total = 0.0
-    landscape_score_total = 0.0
-    centered_face_total = 0.0
-    horizontal_motion_total = 0.0
+    # portrait score, landscape score, centered face, horizontal motion.
+    # The centered-face terms are added after the loop, once detection is done.
+    totals = np.zeros(4, dtype=np.float32)
 
     motion_values: list[float] = []
     motion_timestamps: list[float] = []
 
     prev_gray = None
-    frame_index = 0
+    prev_gray_u = None
 
-    while frame_index < total_frames:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
-        ok, frame = cap.read()
-        if not ok or frame is None:
-            frame_index += sample_stride
-            continue
+    frames, producer = start_frame_producer(cap, cv2, total_frames, sample_stride, analysis_size)
 
-        sampled_frames += 1
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 80, 190)
+    while True:
+        item = frames.get()
+        if item is None:
+            break
+        frame_index, small_bgr, gray = item
 
-        h, w = gray.shape
-        x_mid = w // 2
-        y_mid = h // 2
-
-        left_density = float(edges[:, :x_mid].mean() / 255.0)
-        right_density = float(edges[:, x_mid:].mean() / 255.0)
-        top_density = float(edges[:y_mid, :].mean() / 255.0)
-        bottom_density = float(edges[y_mid:, :].mean() / 255.0)
-
-        center_x1 = int(w * 0.25)
-        center_x2 = int(w * 0.75)
-        center_y1 = int(h * 0.18)
-        center_y2 = int(h * 0.85)
-        center_density = float(edges[center_y1:center_y2, center_x1:center_x2].mean() / 255.0)
-
-        portrait_bias = 1.0 if h >= w else 0.0
-        landscape_bias = 1.0 if w > h else 0.0
-
-        faces = face_detector.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(36, 36))
-        centered_face = 0.0
-        if len(faces) > 0:
-            hits = 0
-            for (x, y, fw, fh) in faces:
-                cx = x + fw / 2.0
-                cy = y + fh / 2.0
-                if 0.28 * w <= cx <= 0.72 * w and 0.18 * h <= cy <= 0.8 * h:
-                    hits += 1
-            centered_face = clamp(hits / max(1, len(faces)), 0.0, 1.0)
+        sampled_frames += 1
+        measured = None
+        gray_u = None
+        if use_opencl:
+            try:
+                gray_u = cv2.UMat(gray)
+                measured = measure_opencl(gray_u, prev_gray_u)
+            except cv2.error as exc:
+                # Switch to the CPU path for the rest of the scan.
+                sys.stderr.write(f"vibecut frame scanner: OpenCL failed, using CPU: {exc}\n")
+                use_opencl = False
+                gray_u = None
+                cv2.ocl.setUseOpenCL(False)
+        if measured is None:
+            measured = measure_cpu(gray, prev_gray)
+        densities, motion_value, horizontal_motion = measured
+        left_density, right_density, top_density, bottom_density, center_density = densities
+
+        if (sampled_frames - 1) % FACE_CACHE_INTERVAL == 0:
+            face_batch.append((small_bgr, gray))
+            if len(face_batch) >= FACE_BATCH_SIZE:
+                if face_batch_results is not None:
+                    face_ratios.extend(face_batch_results)
+                face_batch_results = face_pool.map(centered_face_ratio, face_batch)
+                face_batch = []
 
         portrait_score = (
             0.38 * portrait_bias
             + 0.26 * center_density
-            + 0.22 * centered_face
             + 0.14 * (top_density + bottom_density) * 0.5
         )
         landscape_score = (
             0.42 * landscape_bias
             + 0.27 * ((left_density + right_density) * 0.5)
             + 0.18 * abs(left_density - right_density)
-            + 0.13 * (1.0 - centered_face)
+            + 0.13
         )
 
-        portrait_score_total += portrait_score
-        landscape_score_total += landscape_score
-        centered_face_total += centered_face
-
-        motion_value = 0.0
-        if prev_gray is not None:
-            diff = cv2.absdiff(prev_gray, gray)
-            motion_value = float(diff.mean() / 255.0)
-            horizontal_band = diff[:, int(w * 0.2) : int(w * 0.8)]
-            horizontal_motion_total += float(horizontal_band.mean() / 255.0)
+        totals += (portrait_score, landscape_score, 0.0, horizontal_motion)
 
         motion_values.append(motion_value)
         motion_timestamps.append(frame_index / max(1.0, fps))
 
         prev_gray = gray
-        frame_index += sample_stride
+        prev_gray_u = gray_u
 
+    producer.join()
     cap.release()
 
+    if face_batch_results is not None:
+        face_ratios.extend(face_batch_results)
+    face_ratios.extend(face_pool.map(centered_face_ratio, face_batch))
+    face_pool.shutdown()
+    if detector_names:
+        # stdout carries the JSON payload; report the detector on stderr.
+        sys.stderr.write(f"vibecut frame scanner: face detector {', '.join(sorted(detector_names))}\n")
+
+    # Each detection covers its own sample plus the following samples up to
+    # the next detection; its ratio counts once for each of them.
+    centered_face_total = 0.0
+    for detection_index, ratio in enumerate(face_ratios):
+        covered = min(FACE_CACHE_INTERVAL, sampled_frames - detection_index * FACE_CACHE_INTERVAL)
+        centered_face_total += ratio * covered
+    totals += (0.22 * centered_face_total, -0.13 * centered_face_total, centered_face_total, 0.0)
+
     if sampled_frames <= 0:
         print(json.dumps(fallback_payload()))
         return 0
@@ -177,6 +391,9 @@ def main() -> int:
         if len(unique_peaks) >= 6:
             break
 
+    portrait_score_total, landscape_score_total, centered_face_total, horizontal_motion_total = (
+        float(value) for value in totals
+    )
     portrait_signal = clamp(portrait_score_total / sampled_frames, 0.0, 1.0)
     landscape_signal = clamp(landscape_score_total / sampled_frames, 0.0, 1.0)
     centered_face_signal = clamp(centered_face_total / sampled_frames, 0.0, 1.0)
@@ -12,6 +12,9 @@ import argparse
 import json
 import os
 import re
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Any, Iterable
 
@@ -66,6 +69,25 @@ EMOJI_FONT_CANDIDATES = [
 ]
 
 
+# Preferred hardware H.264 encoders, fastest first; libx264 is the fallback.
+HW_ENCODER_CANDIDATES = ["h264_nvenc", "h264_videotoolbox", "h264_qsv"]
+
+ENCODER_PARAMS: dict[str, list[str]] = {
+    "h264_nvenc": ["-preset", "p5", "-rc", "vbr", "-cq", "23"],
+    "h264_videotoolbox": ["-allow_sw", "1"],
+    "h264_qsv": ["-preset", "medium"],
+    "libx264": [],
+}
+
+MAX_RENDER_WORKERS = 3
+
+# Every clip file must share these stream parameters, since the clips are
+# joined with the concat demuxer and `-c copy`.
+OUTPUT_FPS = 30
+OUTPUT_AUDIO_FPS = 44100
+OUTPUT_AUDIO_CHANNELS = 2
+
+
 def clamp(value: float, low: float, high: float) -> float:
     return max(low, min(high, value))
 
@@ -703,6 +725,304 @@ def generate_caption_agent(video_path: str, transcript: Any):
     return composite
 
 
+def _resolve_ffmpeg_binary() -> str:
+    explicit = os.environ.get("IMAGEIO_FFMPEG_EXE", "").strip() or os.environ.get("FFMPEG_PATH", "").strip()
+    if explicit:
+        return explicit
+    try:
+        import imageio_ffmpeg  # type: ignore
+
+        return str(imageio_ffmpeg.get_ffmpeg_exe())
+    except Exception:
+        return "ffmpeg"
+
+
+FFMPEG_STDERR_TAIL_CHARS = 1500
+
+
+def _log_ffmpeg_failure(label: str, stderr: Any) -> None:
+    # stdout carries the JSON result; diagnostics for skipped fast paths go to stderr.
+    text = stderr.decode("utf-8", errors="replace") if isinstance(stderr, bytes) else str(stderr or "")
+    text = text.strip()[-FFMPEG_STDERR_TAIL_CHARS:]
+    sys.stderr.write(f"vibecut: {label}{': ' + text if text else ''}\n")
+
+
+def _encoder_works(ffmpeg_bin: str, encoder: str) -> bool:
+    # Being listed by `-encoders` only means ffmpeg was built with it; a tiny
+    # test encode confirms the device is actually usable on this host.
+    try:
+        probe = subprocess.run(
+            [
+                ffmpeg_bin,
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-f",
+                "lavfi",
+                "-i",
+                "color=c=black:s=256x256:d=0.1",
+                "-c:v",
+                encoder,
+                "-f",
+                "null",
+                "-",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=20,
+        )
+    except Exception as exc:
+        _log_ffmpeg_failure(f"{encoder} test encode failed", exc)
+        return False
+    if probe.returncode != 0:
+        _log_ffmpeg_failure(f"{encoder} test encode failed", probe.stderr)
+        return False
+    return True
+
+
+def _detect_video_encoder(ffmpeg_bin: str) -> str:
+    override = os.environ.get("VIBECUT_VIDEO_ENCODER", "").strip()
+    if override:
+        return override
+    try:
+        listing = subprocess.run(
+            [ffmpeg_bin, "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            timeout=20,
+        ).stdout
+    except Exception as exc:
+        _log_ffmpeg_failure("ffmpeg encoder listing failed; using libx264", exc)
+        return "libx264"
+    for encoder in HW_ENCODER_CANDIDATES:
+        if encoder in listing and _encoder_works(ffmpeg_bin, encoder):
+            return encoder
+    return "libx264"
+
+
+def _video_write_kwargs(mode: str, encoder: str) -> dict[str, Any]:
+    return {
+        "fps": OUTPUT_FPS,
+        "codec": encoder,
+        "audio_codec": "aac",
+        "audio_fps": OUTPUT_AUDIO_FPS,
+        "bitrate": "8M" if mode == "vertical" else "10M",
+        "audio_bitrate": "128k",
+        "ffmpeg_params": [*ENCODER_PARAMS.get(encoder, []), "-pix_fmt", "yuv420p", "-movflags", "+faststart"],
+        "logger": None,
+    }
+
+
+def _concat_clips_stream_copy(ffmpeg_bin: str, clip_paths: list[str], combined_path: Path) -> bool:
+    # Every clip is written with the same codec, fps and pixel format, so the
+    # concat demuxer can join them without decoding or re-encoding.
+    concat_list = combined_path.with_name("concat.txt")
+    lines = []
+    for clip_path in clip_paths:
+        escaped = str(Path(clip_path).resolve()).replace("'", "'\\''")
+        lines.append(f"file '{escaped}'")
+    try:
+        concat_list.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        result = subprocess.run(
+            [
+                ffmpeg_bin,
+                "-y",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                str(concat_list),
+                "-c",
+                "copy",
+                "-movflags",
+                "+faststart",
+                str(combined_path),
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        if result.returncode != 0 or not combined_path.exists():
+            _log_ffmpeg_failure("stream-copy concat failed; re-encoding with MoviePy", result.stderr)
+            return False
+        return True
+    except Exception as exc:
+        _log_ffmpeg_failure("stream-copy concat failed; re-encoding with MoviePy", exc)
+        return False
+    finally:
+        try:
+            concat_list.unlink()
+        except Exception:
+            pass
+
+
+def _ffmpeg_fit_filter(mode: str, speed: float) -> str:
+    filters = []
+    if speed > 1.001:
+        filters.append(f"setpts=PTS/{speed:.4f}")
+    # zoompan numbers its output frames itself and emits one per input frame,
+    # so the stream must already be at the output rate (after any speed-up)
+    # or non-30fps sources come out at the wrong length.
+    filters.append(f"fps={OUTPUT_FPS}")
+    if mode == "vertical":
+        # Cover-crop to 9:16, then the same energetic zoom-in the MoviePy path
+        # used (1.02 -> 1.055 over the first 0.6s), all inside swscale.
+        filters.extend(
+            [
+                "scale=1080:1920:force_original_aspect_ratio=increase:flags=lanczos",
+                "crop=1080:1920",
+                "zoompan=z='1.02+0.035*min(1,it/0.6)':d=1"
+                f":x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s=1080x1920:fps={OUTPUT_FPS}",
+            ]
+        )
+    else:
+        filters.extend(
+            [
+                "scale=1920:1080:force_original_aspect_ratio=decrease:flags=lanczos",
+                "pad=1920:1080:(ow-iw)/2:(oh-ih)/2:color=black",
+            ]
+        )
+    filters.append("setsar=1")
+    return ",".join(filters)
+
+
+def _ffmpeg_fit_segment(job: dict[str, Any], output_path: Path, intermediate: bool = False) -> bool:
+    """
+    Trim, speed up and fit one segment with ffmpeg. With ``intermediate`` the
+    result is only an input for the MoviePy caption pass, so it is written
+    lossless (x264 qp 0, PCM audio) to avoid a second generation of loss.
+    """
+    start = float(job["start"])
+    end = float(job["end"])
+    speed = float(job["speed"])
+    mode = str(job["mode"])
+    encoder = str(job["encoder"])
+    write = _video_write_kwargs(mode, encoder)
+    if intermediate:
+        video_args = ["-c:v", "libx264", "-preset", "ultrafast", "-qp", "0", "-pix_fmt", "yuv420p"]
+        audio_args = ["-c:a", "pcm_s16le"]
+    else:
+        video_args = ["-c:v", encoder, "-b:v", str(write["bitrate"]), *write["ffmpeg_params"]]
+        audio_args = ["-c:a", "aac", "-b:a", str(write["audio_bitrate"])]
+    cmd = [
+        str(job["ffmpeg"]),
+        "-y",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        # -ss before -i seeks on the input keyframe index instead of decoding
+        # everything up to the segment start.
+        "-ss",
+        f"{start:.3f}",
+        "-t",
+        f"{max(0.0, end - start):.3f}",
+        "-i",
+        str(job["input"]),
+        "-map",
+        "0:v:0",
+        "-map",
+        "0:a:0?",
+        "-vf",
+        _ffmpeg_fit_filter(mode, speed),
+        "-r",
+        str(OUTPUT_FPS),
+        *video_args,
+        *audio_args,
+        "-ar",
+        str(OUTPUT_AUDIO_FPS),
+        "-ac",
+        str(OUTPUT_AUDIO_CHANNELS),
+    ]
+    if speed > 1.001:
+        cmd.extend(["-af", f"atempo={speed:.4f}"])
+    cmd.append(str(output_path))
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except Exception as exc:
+        _log_ffmpeg_failure("ffmpeg segment fit failed; falling back to MoviePy", exc)
+        return False
+    if result.returncode != 0 or not output_path.exists():
+        _log_ffmpeg_failure("ffmpeg segment fit failed; falling back to MoviePy", result.stderr)
+        return False
+    return True
+
+
+def _render_segment_moviepy(job: dict[str, Any]) -> str:
+    from moviepy.editor import VideoFileClip, vfx
+
+    start = float(job["start"])
+    end = float(job["end"])
+    speed = float(job["speed"])
+    mode = str(job["mode"])
+    sub = None
+    processed = None
+    with VideoFileClip(str(job["input"])) as source:
+        try:
+            sub = source.subclip(start, end)
+            if speed > 1.001:
+                sub = sub.fx(vfx.speedx, factor=speed)
+
+            processed = fit_clip_vertical(sub) if mode == "vertical" else fit_clip_horizontal(sub)
+
+            if job["words"]:
+                processed = _apply_caption_agent_to_clip(processed, job["words"])
+
+            processed.write_videofile(str(job["output"]), **_video_write_kwargs(mode, str(job["encoder"])))
+        finally:
+            if processed is not None:
+                try:
+                    processed.close()
+                except Exception:
+                    pass
+            if sub is not None:
+                try:
+                    sub.close()
+                except Exception:
+                    pass
+    return str(job["output"])
+
+
+def _render_segment(job: dict[str, Any]) -> str:
+    """
+    Render one segment to its own clip file. Runs in a worker process, so it
+    opens its own clips rather than receiving unpicklable clip objects.
+
+    Trim, speed-up, fit and zoom run as a single ffmpeg pass; MoviePy is only
+    used to overlay captions, or for the whole segment if ffmpeg fails.
+    """
+    from moviepy.editor import VideoFileClip
+
+    output_path = Path(str(job["output"]))
+    words = job["words"]
+    fit_path = output_path.with_name(f"{output_path.stem}.fit.mkv") if words else output_path
+    if not _ffmpeg_fit_segment(job, fit_path, intermediate=bool(words)):
+        return _render_segment_moviepy(job)
+    if not words:
+        return str(output_path)
+
+    processed = None
+    try:
+        with VideoFileClip(str(fit_path)) as fitted:
+            try:
+                processed = _apply_caption_agent_to_clip(fitted, words)
+                processed.write_videofile(str(output_path), **_video_write_kwargs(str(job["mode"]), str(job["encoder"])))
+            finally:
+                if processed is not None:
+                    try:
+                        processed.close()
+                    except Exception:
+                        pass
+    finally:
+        try:
+            fit_path.unlink()
+        except Exception:
+            pass
+    return str(output_path)
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="VibeCut MoviePy pipeline")
     parser.add_argument("--input", required=True)
@@ -721,7 +1041,7 @@ def main() -> int:
         return 0
 
     try:
-        from moviepy.editor import VideoFileClip, concatenate_videoclips, vfx
+        from moviepy.editor import VideoFileClip, concatenate_videoclips
     except Exception as exc:
         print(json.dumps({"ok": False, "error": f"moviepy_import_failed:{exc}", "clipPaths": []}))
         return 0
@@ -745,88 +1065,66 @@ def main() -> int:
             if full_words:
                 transcript_source = "transcript_synth"
 
+    ffmpeg_bin = _resolve_ffmpeg_binary()
+    encoder = _detect_video_encoder(ffmpeg_bin)
+
     try:
         with VideoFileClip(str(input_path)) as source:
             duration = float(source.duration or 0.0)
-            if duration <= 0.0:
-                print(json.dumps({"ok": False, "error": "invalid_duration", "clipPaths": []}))
-                return 0
-
-            segments = parse_segments(args.segments_json, duration)
-            if not segments:
-                segments = [{"start": 0.0, "end": round(min(duration, 20.0), 3), "speed": 1.0}]
-
-            if args.mode == "vertical":
-                segments = segments[:3]
-
-            for idx, segment in enumerate(segments, start=1):
-                start = float(segment["start"])
-                end = float(segment["end"])
-                speed = float(segment.get("speed", 1.0) or 1.0)
-                sub = None
-                processed = None
-                try:
-                    sub = source.subclip(start, end)
-                    if speed > 1.001:
-                        sub = sub.fx(vfx.speedx, factor=speed)
-
-                    processed = fit_clip_vertical(sub) if args.mode == "vertical" else fit_clip_horizontal(sub)
-
-                    if args.mode == "vertical" and full_words:
-                        segment_words = _slice_words_for_segment(full_words, start, end, speed)
-                        if segment_words:
-                            processed = _apply_caption_agent_to_clip(processed, segment_words)
-
-                    out_path = output_dir / f"clip_{idx:02d}.mp4"
-                    processed.write_videofile(
-                        str(out_path),
-                        fps=30,
-                        codec="libx264",
-                        audio_codec="aac",
-                        bitrate="8M" if args.mode == "vertical" else "10M",
-                        audio_bitrate="128k",
-                        ffmpeg_params=["-pix_fmt", "yuv420p", "-movflags", "+faststart"],
-                        logger=None,
-                    )
-                    clip_paths.append(str(out_path))
-                finally:
-                    if processed is not None:
-                        try:
-                            processed.close()
-                        except Exception:
-                            pass
-                    if sub is not None:
-                        try:
-                            sub.close()
-                        except Exception:
-                            pass
-
-            if clip_paths:
-                combined_inputs = [VideoFileClip(path) for path in clip_paths]
-                combined = None
-                try:
-                    combined = concatenate_videoclips(combined_inputs, method="compose")
-                    combined.write_videofile(
-                        str(combined_path),
-                        fps=30,
-                        codec="libx264",
-                        audio_codec="aac",
-                        bitrate="8M" if args.mode == "vertical" else "10M",
-                        audio_bitrate="128k",
-                        ffmpeg_params=["-pix_fmt", "yuv420p", "-movflags", "+faststart"],
-                        logger=None,
-                    )
-                finally:
-                    if combined is not None:
-                        try:
-                            combined.close()
-                        except Exception:
-                            pass
-                    for clip in combined_inputs:
-                        try:
-                            clip.close()
-                        except Exception:
-                            pass
+        if duration <= 0.0:
+            print(json.dumps({"ok": False, "error": "invalid_duration", "clipPaths": []}))
+            return 0
+
+        segments = parse_segments(args.segments_json, duration)
+        if not segments:
+            segments = [{"start": 0.0, "end": round(min(duration, 20.0), 3), "speed": 1.0}]
+
+        if args.mode == "vertical":
+            segments = segments[:3]
+
+        jobs: list[dict[str, Any]] = []
+        for idx, segment in enumerate(segments, start=1):
+            start = float(segment["start"])
+            end = float(segment["end"])
+            speed = float(segment.get("speed", 1.0) or 1.0)
+            segment_words: list[dict[str, Any]] = []
+            if args.mode == "vertical" and full_words:
+                segment_words = _slice_words_for_segment(full_words, start, end, speed)
+            jobs.append(
+                {
+                    "input": str(input_path),
+                    "output": str(output_dir / f"clip_{idx:02d}.mp4"),
+                    "start": start,
+                    "end": end,
+                    "speed": speed,
+                    "mode": args.mode,
+                    "words": segment_words,
+                    "encoder": encoder,
+                    "ffmpeg": ffmpeg_bin,
+                }
+            )
+
+        with ProcessPoolExecutor(max_workers=min(MAX_RENDER_WORKERS, len(jobs))) as pool:
+            clip_paths.extend(pool.map(_render_segment, jobs))
+
+        # Fall back to a MoviePy re-encode if stream copy fails (e.g. mismatched SPS/PPS).
+        if clip_paths and not _concat_clips_stream_copy(ffmpeg_bin, clip_paths, combined_path):
+            combined_inputs = [VideoFileClip(path) for path in clip_paths]
+            combined = None
+            try:
+                combined = concatenate_videoclips(combined_inputs, method="compose")
+                combined.write_videofile(str(combined_path), **_video_write_kwargs(args.mode, encoder))
+            finally:
+                if combined is not None:
+                    try:
+                        combined.close()
+                    except Exception:
+                        pass
+                for clip in combined_inputs:
+                    try:
+                        clip.close()
+                    except Exception:
+                        pass
     except Exception as exc:
         print(json.dumps({"ok": False, "error": f"pipeline_failed:{exc}", "clipPaths": []}))
         return 0
@@ -0,0 +1,250 @@
+import { spawn, type ChildProcessWithoutNullStreams } from 'child_process'
+
+// Persistent `faster_whisper_transcribe.py --serve` children. Loading a Whisper
+// model dominates short transcriptions, so a few children per (python, args)
+// stay alive and receive jobs as NDJSON on stdin instead of re-spawning per file.
+
+export type FasterWhisperServerSpec = {
+  command: string
+  args: string[]
+  env?: NodeJS.ProcessEnv
+}
+
+export type FasterWhisperServerJob = {
+  input: string
+  outputDir: string
+  baseName?: string
+  language?: string
+  beamSize?: number
+  wordTimestamps?: boolean
+}
+
+export type FasterWhisperServerResult = {
+  ok: boolean
+  result: Record<string, any> | null
+  stderr: string
+}
+
+type QueuedJob = {
+  job: FasterWhisperServerJob
+  timeoutMs: number
+  resolve: (result: FasterWhisperServerResult) => void
+}
+
+type ActiveJob = QueuedJob & {
+  id: string
+  timer: NodeJS.Timeout
+}
+
+type ServerEntry = {
+  key: string
+  spec: FasterWhisperServerSpec
+  child: ChildProcessWithoutNullStreams
+  stdoutBuffer: string
+  stderrTail: string
+  queue: QueuedJob[]
+  active: ActiveJob | null
+  idleTimer: NodeJS.Timeout | null
+  closed: boolean
+}
+
+const STDERR_TAIL_LIMIT = 8_000
+
+export const FASTER_WHISPER_PERSISTENT = !/^(0|false|no|off)$/i.test(
+  String(process.env.FASTER_WHISPER_PERSISTENT ?? 'true').trim()
+)
+const FASTER_WHISPER_SERVE_IDLE_MS = (() => {
+  const raw = Number(process.env.FASTER_WHISPER_SERVE_IDLE_MS || 10 * 60_000)
+  if (!Number.isFinite(raw)) return 10 * 60_000
+  return Math.max(10_000, Math.min(6 * 60 * 60_000, Math.round(raw)))
+})()
+const FASTER_WHISPER_SERVE_MAX_CHILDREN = (() => {
+  const raw = Number(process.env.FASTER_WHISPER_SERVE_MAX_CHILDREN || 2)
+  if (!Number.isFinite(raw)) return 2
+  return Math.max(1, Math.min(8, Math.round(raw)))
+})()
+
+const servers = new Map<string, ServerEntry[]>()
+let nextJobId = 1
+
+const appendTail = (current: string, chunk: Buffer | string) => {
+  const merged = current + String(chunk || '')
+  return merged.length <= STDERR_TAIL_LIMIT ? merged : merged.slice(merged.length - STDERR_TAIL_LIMIT)
+}
+
+const finishActive = (entry: ServerEntry, result: FasterWhisperServerResult) => {
+  const active = entry.active
+  if (!active) return
+  entry.active = null
+  clearTimeout(active.timer)
+  active.resolve(result)
+}
+
+const closeEntry = (entry: ServerEntry, reason: string) => {
+  if (entry.closed) return
+  entry.closed = true
+  const siblings = (servers.get(entry.key) || []).filter((candidate) => candidate !== entry)
+  if (siblings.length) servers.set(entry.key, siblings)
+  else servers.delete(entry.key)
+  if (entry.idleTimer) clearTimeout(entry.idleTimer)
+  finishActive(entry, { ok: false, result: null, stderr: appendTail(entry.stderrTail, `\n${reason}`) })
+  // Jobs that were still waiting go to a fresh child.
+  const pending = entry.queue.splice(0)
+  for (const queued of pending) {
+    enqueue(entry.spec, queued)
+  }
+}
+
+const handleLine = (entry: ServerEntry, line: string) => {
+  const trimmed = line.trim()
+  if (!trimmed || !entry.active) return
+  let parsed: any = null
+  try {
+    parsed = JSON.parse(trimmed)
+  } catch {
+    // ignore non-JSON output from libraries writing to stdout
+    return
+  }
+  if (!parsed || typeof parsed !== 'object' || String(parsed.id ?? '') !== entry.active.id) return
+  const stderr = entry.stderrTail
+  entry.stderrTail = ''
+  finishActive(entry, { ok: parsed.ok === true, result: parsed, stderr: parsed.ok === true ? stderr : String(parsed.error || stderr) })
+  pump(entry)
+}
+
+const pump = (entry: ServerEntry) => {
+  if (entry.closed || entry.active) return
+  const next = entry.queue.shift()
+  if (!next) {
+    if (!entry.idleTimer) {
+      entry.idleTimer = setTimeout(() => {
+        entry.idleTimer = null
+        if (entry.active || entry.queue.length) return
+        // Closing stdin ends the serve loop and frees the model.
+        closeEntry(entry, 'faster-whisper server idle shutdown')
+        try {
+          entry.child.stdin.end()
+        } catch {
+          // ignore
+        }
+      }, FASTER_WHISPER_SERVE_IDLE_MS)
+      entry.idleTimer.unref()
+    }
+    return
+  }
+  if (entry.idleTimer) {
+    clearTimeout(entry.idleTimer)
+    entry.idleTimer = null
+  }
+  const id = String(nextJobId++)
+  const timer = setTimeout(() => {
+    // A job cannot be cancelled inside the child, so a timeout costs the child.
+    closeEntry(entry, `faster-whisper job timeout after ${Math.round(next.timeoutMs)}ms`)
+    try {
+      entry.child.kill('SIGKILL')
+    } catch {
+      // ignore
+    }
+  }, next.timeoutMs)
+  entry.active = { ...next, id, timer }
+  const payload = {
+    id,
+    input: next.job.input,
+    output_dir: next.job.outputDir,
+    base_name: next.job.baseName,
+    language: next.job.language,
+    beam_size: next.job.beamSize,
+    word_timestamps: next.job.wordTimestamps
+  }
+  try {
+    entry.child.stdin.write(`${JSON.stringify(payload)}\n`)
+  } catch (error: any) {
+    closeEntry(entry, `faster-whisper server write failed: ${error?.message || error}`)
+  }
+}
+
+const startServer = (spec: FasterWhisperServerSpec, key: string): ServerEntry => {
+  const child = spawn(spec.command, [...spec.args, '--serve'], {
+    env: spec.env,
+    windowsHide: true
+  })
+  const entry: ServerEntry = {
+    key,
+    spec,
+    child,
+    stdoutBuffer: '',
+    stderrTail: '',
+    queue: [],
+    active: null,
+    idleTimer: null,
+    closed: false
+  }
+  // An idle child must not keep the Node process alive; in-flight jobs are
+  // kept alive by their timeout timer.
+  child.unref()
+  ;(child.stdin as any)?.unref?.()
+  ;(child.stdout as any)?.unref?.()
+  ;(child.stderr as any)?.unref?.()
+
+  child.stdout.setEncoding('utf8')
+  child.stdout.on('data', (chunk) => {
+    entry.stdoutBuffer += String(chunk || '')
+    let newlineIndex = entry.stdoutBuffer.indexOf('\n')
+    while (newlineIndex >= 0) {
+      const line = entry.stdoutBuffer.slice(0, newlineIndex)
+      entry.stdoutBuffer = entry.stdoutBuffer.slice(newlineIndex + 1)
+      handleLine(entry, line)
+      newlineIndex = entry.stdoutBuffer.indexOf('\n')
+    }
+  })
+  child.stderr.on('data', (chunk) => {
+    entry.stderrTail = appendTail(entry.stderrTail, chunk)
+  })
+  child.stdin.on('error', () => {
+    // surfaced through the close handler
+  })
+  child.on('error', (error) => {
+    closeEntry(entry, `faster-whisper server failed to start: ${error?.message || error}`)
+  })
+  child.on('close', (code, signal) => {
+    closeEntry(entry, `faster-whisper server exited (${signal || code})`)
+  })
+  return entry
+}
+
+const enqueue = (spec: FasterWhisperServerSpec, queued: QueuedJob) => {
+  const key = JSON.stringify([spec.command, spec.args])
+  const entries = servers.get(key) || []
+  const load = (candidate: ServerEntry) => candidate.queue.length + (candidate.active ? 1 : 0)
+  let entry = entries.find((candidate) => load(candidate) === 0)
+  if (!entry && entries.length < FASTER_WHISPER_SERVE_MAX_CHILDREN) {
+    entry = startServer(spec, key)
+    servers.set(key, [...entries, entry])
+  }
+  if (!entry) {
+    entry = entries.reduce((best, candidate) => (load(candidate) < load(best) ? candidate : best))
+  }
+  entry.queue.push(queued)
+  pump(entry)
+}
+
+export const runFasterWhisperServerJob = (
+  spec: FasterWhisperServerSpec,
+  job: FasterWhisperServerJob,
+  timeoutMs: number
+) => {
+  return new Promise<FasterWhisperServerResult>((resolve) => {
+    enqueue(spec, { job, timeoutMs, resolve })
+  })
+}
+
+export const shutdownFasterWhisperServers = () => {
+  for (const entry of Array.from(servers.values()).flat()) {
+    closeEntry(entry, 'faster-whisper server shutdown')
+    try {
+      entry.child.stdin.end()
+    } catch {
+      // ignore
+    }
+  }
+}
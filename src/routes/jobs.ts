@@ -70,6 +70,7 @@ import {
 import { planRetentionEditsWithFreeAi } from '../lib/freeAiRetentionPlanner'
 import { applyWatermarkOverride, getFeatureLabControls } from '../services/featureLab'
 import { getCaptionEngineStatus } from '../lib/captionEngine'
+import { FASTER_WHISPER_PERSISTENT, runFasterWhisperServerJob } from '../lib/fasterWhisperServer'
 import { chooseConfigForJobCreation, computeAndStoreRenderQualityMetric } from '../dev/algorithm/integration/pipelineIntegration'
 import { runFeedbackLoop } from '../dev/algorithm/feedbackLoop/feedbackLoopService'
 import { buildFullAutoYoutubePreset, parseFullAutoYoutubeRequest } from '../services/fullAutoYoutube'
@@ -27920,6 +27921,10 @@ const splitWhisperArgs = (raw?: string | null) => {
     .filter(Boolean)
 }
 
+const hasWhisperArg = (args: string[], ...flags: string[]) => (
+  args.some((arg) => flags.some((flag) => arg === flag || arg.startsWith(`${flag}=`)))
+)
+
 type SubtitleGenerationPurpose = 'analysis' | 'captions' | 'hook_rescue' | 'test'
 
 type SubtitleGenerationProfile = {
@@ -28214,7 +28219,8 @@ const generateSubtitlesViaFasterWhisper = async (
   const model = lightweightProfile && lightweightModelOverride ? lightweightModelOverride : defaultModel
   const language = String(process.env.FASTER_WHISPER_LANGUAGE || process.env.CAPTION_LANGUAGE || process.env.WHISPER_LANGUAGE || '').trim()
   const device = String(process.env.FASTER_WHISPER_DEVICE || '').trim()
-  const computeType = String(process.env.FASTER_WHISPER_COMPUTE_TYPE || 'int8').trim() || 'int8'
+  // Unset lets the script pick "auto" (int8_float16 on capable GPUs, int8 on CPU).
+  const computeType = String(process.env.FASTER_WHISPER_COMPUTE_TYPE || '').trim()
   const beamSize = resolveFasterWhisperBeamSize(profile)
   const wordTimestampsEnabled = resolveTranscriptWordTimestampsEnabled(profile)
   const extraArgs = splitWhisperArgs(process.env.FASTER_WHISPER_ARGS)
@@ -28246,7 +28252,7 @@ const generateSubtitlesViaFasterWhisper = async (
       String(beamSize),
       '--vad-filter'
     ]
-    if (!wordTimestampsEnabled) args.push('--no-word-timestamps')
+    if (wordTimestampsEnabled) args.push('--word-timestamps')
     if (language) args.push('--language', language)
     if (device) args.push('--device', device)
     if (computeType) args.push('--compute-type', computeType)
@@ -28265,6 +28271,43 @@ const generateSubtitlesViaFasterWhisper = async (
       env.PATH = prependPathEntry(process.env.PATH, ffmpegDir)
     }
 
+    if (FASTER_WHISPER_PERSISTENT) {
+      // The model stays loaded in a --serve child between jobs; only
+      // per-file settings travel with each job.
+      const serverArgs = [...attempt.preArgs, FASTER_WHISPER_SCRIPT_PATH, '--model', model]
+      if (device) serverArgs.push('--device', device)
+      if (computeType) serverArgs.push('--compute-type', computeType)
+      if (extraArgs.length) serverArgs.push(...extraArgs)
+      // Per-job keys override the child's CLI defaults, so leave out any the
+      // operator pinned in FASTER_WHISPER_ARGS; it wins in both modes.
+      const served = await runFasterWhisperServerJob(
+        { command, args: serverArgs, env },
+        {
+          input: inputPath,
+          outputDir: workingDir,
+          baseName,
+          language: hasWhisperArg(extraArgs, '--language') ? undefined : language,
+          beamSize: hasWhisperArg(extraArgs, '--beam-size') ? undefined : beamSize,
+          wordTimestamps: hasWhisperArg(extraArgs, '--word-timestamps', '--no-word-timestamps')
+            ? undefined
+            : wordTimestampsEnabled
+        },
+        FASTER_WHISPER_TIMEOUT_MS
+      )
+      if (!served.ok) {
+        const reason = String(served.stderr || '').trim().slice(0, 220)
+        console.warn(`subtitle generation failed via ${attempt.label}${reason ? `: ${reason}` : ''}`)
+        continue
+      }
+      const servedSrtPath = typeof served.result?.srtPath === 'string' ? served.result.srtPath : null
+      if (servedSrtPath && fs.existsSync(servedSrtPath)) {
+        return servedSrtPath
+      }
+      const servedFallbackPath = resolveGeneratedSubtitlePath(inputPath, workingDir)
+      if (servedFallbackPath) return servedFallbackPath
+      continue
+    }
+
     const output = await new Promise<{ ok: boolean; stdout: string; stderr: string }>((resolve) => {
       let stdout = ''
       let stderr = ''
@@ -6,6 +6,7 @@ import crypto from 'crypto'
 import { spawn } from 'child_process'
 import multer from 'multer'
 import { FFMPEG_PATH, FFPROBE_PATH, formatCommand } from '../lib/ffmpeg'
+import { FASTER_WHISPER_PERSISTENT, runFasterWhisperServerJob } from '../lib/fasterWhisperServer'
 import { queryRetentionModel } from '../lib/aiService'
 import { planRetentionEditsWithFreeAi } from '../lib/freeAiRetentionPlanner'
 import {
@@ -906,6 +907,13 @@ const PYTHON_BIN = String(process.env.PYTHON_BIN || process.env.PYTHON_PATH || '
 const VIBECUT_FRAME_SCANNER_SCRIPT = resolveScriptPath(path.join('scripts', 'vibecut_frame_scanner.py'))
 const VIBECUT_MOVIEPY_PIPELINE_SCRIPT = resolveScriptPath(path.join('scripts', 'vibecut_moviepy_pipeline.py'))
 const FASTER_WHISPER_SCRIPT = resolveScriptPath(path.join('scripts', 'faster_whisper_transcribe.py'))
+// runProcess has no timeout when callers pass none; a served job needs one so a
+// hung child is killed and replaced instead of blocking the queue.
+const VIBECUT_WHISPER_SERVE_TIMEOUT_MS = (() => {
+  const raw = Number(process.env.VIBECUT_WHISPER_TIMEOUT_MS || 15 * 60_000)
+  if (!Number.isFinite(raw)) return 15 * 60_000
+  return clamp(Math.round(raw), 30_000, 60 * 60_000)
+})()
 
 const runProcess = async (
   cmd: string,
@@ -1874,23 +1882,41 @@ const readTranscriptSummary = async (
   }
 
   const baseName = 'vibecut_transcript'
-  const args = [
-    FASTER_WHISPER_SCRIPT,
-    '--input',
-    inputPath,
-    '--output-dir',
-    jobDir,
-    '--base-name',
-    baseName,
-    '--model',
-    String(process.env.VIBECUT_WHISPER_MODEL || 'small'),
-    '--vad-filter'
-  ]
+  const model = String(process.env.VIBECUT_WHISPER_MODEL || 'small')
+  if (FASTER_WHISPER_PERSISTENT) {
+    const served = await runFasterWhisperServerJob(
+      { command: PYTHON_BIN, args: [FASTER_WHISPER_SCRIPT, '--model', model] },
+      // The vertical MoviePy caption agent reads word timings from this transcript.
+      { input: inputPath, outputDir: jobDir, baseName, wordTimestamps: true },
+      Number.isFinite(Number(opts?.timeoutMs)) && Number(opts?.timeoutMs) > 0
+        ? Number(opts?.timeoutMs)
+        : VIBECUT_WHISPER_SERVE_TIMEOUT_MS
+    )
+    if (!served.ok) {
+      console.warn('vibecut whisper failed', served.stderr)
+      return fallback
+    }
+  } else {
+    const args = [
+      FASTER_WHISPER_SCRIPT,
+      '--input',
+      inputPath,
+      '--output-dir',
+      jobDir,
+      '--base-name',
+      baseName,
+      '--model',
+      model,
+      '--vad-filter',
+      // The vertical MoviePy caption agent reads word timings from this transcript.
+      '--word-timestamps'
+    ]
 
-  const result = await runProcess(PYTHON_BIN, args, undefined, opts?.timeoutMs)
-  if (result.code !== 0) {
-    console.warn('vibecut whisper failed', result.stderr || result.stdout)
-    return fallback
+    const result = await runProcess(PYTHON_BIN, args, undefined, opts?.timeoutMs)
+    if (result.code !== 0) {
+      console.warn('vibecut whisper failed', result.stderr || result.stdout)
+      return fallback
+    }
   }
 
   const transcriptPath = path.join(jobDir, `${baseName}.transcript.json`)